@@ -1,42 +1,92 @@
+import asyncio
+import orjson
 import google.generativeai as genai
-from utils.verif_rules import VERIFICATION_PROMPT, ENHANCEMENT_SUGGESTIONS_MAP, assess_verdict
+from utils.verif_rules import VERIFICATION_PROMPT, VERIFICATION_PROMPT_BATCH, ENHANCEMENT_SUGGESTIONS_MAP, SCORE_FIELDS, assess_verdict
+from utils.llm_cache import cached_generate, cached_generate_async
+from utils.llm_json import parse_json_response
 from dotenv import load_dotenv
 import os
 load_dotenv()
 
 GOOGLE_API_KEY= os.getenv("GOOGLE_API_KEY")
 
-genai.configure(api_key="GOOGLE_API_KEY")
+_model = None
 
-model = genai.GenerativeModel("gemini-2.5-flash")
+def _get_model():
+    # Configure and build the model on first use so importing this module stays cheap
+    global _model
+    if _model is None:
+        genai.configure(api_key=GOOGLE_API_KEY)
+        _model = genai.GenerativeModel("gemini-2.5-flash")
+    return _model
 
-def evaluate_idea(idea: str):
-    prompt = VERIFICATION_PROMPT.format(idea=idea)
-    response = model.generate_content(prompt).text
+# Upper bound on in-flight Gemini requests, sized to the API tier's rate limit
+MAX_CONCURRENT_REQUESTS = 20
+
+# Ideas multiplexed into one Gemini call by evaluate_ideas_batched, bounded by the response size
+IDEAS_PER_BATCH = 10
+
+# Appended to the prompt for the single retry after an unparseable response
+STRICT_JSON_SUFFIX = "\nReturn STRICT JSON only: a single JSON object, with no markdown fences or prose."
+
+def _is_scored(item) -> bool:
+    # _build_result compares every score numerically, so each must be absent or an int/float
+    if not isinstance(item, dict):
+        return False
+    for key in SCORE_FIELDS.values():
+        value = item.get(key, 0)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+    return True
+
+def _parse_evaluation(response: str):
+    try:
+        parsed = parse_json_response(response)
+    except ValueError:
+        return None
+    return parsed if _is_scored(parsed) else None
 
+def _is_evaluation(response: str) -> bool:
+    return _parse_evaluation(response) is not None
+
+def _parse_batch(response: str, count: int):
+    # None when the reply is not one entry per idea; otherwise each entry is its evaluation, or None if unusable
     try:
-        import json
-        parsed = json.loads(response)
-    except:
-        return {
-            "status": "error",
-            "message": "Failed to parse model output",
-            "raw": response
-        }
-
-    scores = {
-        "relevance_score": parsed.get("relevance_score", 0),
-        "Market Viability": parsed.get("market_viability", 0),
-        "Competitive Edge": parsed.get("competitive_edge", 0),
-        "Revenue Model": parsed.get("revenue_model", 0),
-        "Team Capability": parsed.get("team_capability", 0)
+        parsed = parse_json_response(response)
+    except ValueError:
+        return None
+    if not isinstance(parsed, list) or len(parsed) != count:
+        return None
+    return [item if _is_scored(item) else None for item in parsed]
+
+def _is_complete_batch(response: str, count: int) -> bool:
+    parsed = _parse_batch(response, count)
+    return parsed is not None and None not in parsed
+
+def _error_result(message: str, raw):
+    return {
+        "status": "error",
+        "message": message,
+        "raw": raw
     }
 
+async def _gather_results(tasks):
+    # A failed request becomes that idea's error result instead of failing every idea gathered with it
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome
+    return [
+        _error_result("Model request failed", str(outcome)) if isinstance(outcome, Exception) else outcome
+        for outcome in outcomes
+    ]
+
+def _build_result(parsed: dict):
+    scores = {label: parsed.get(key, 0) for label, key in SCORE_FIELDS.items()}
+
     verdict, weak_areas = assess_verdict(scores)
 
-    suggestions = {}
-    for area in weak_areas:
-        suggestions[area] = ENHANCEMENT_SUGGESTIONS_MAP.get(area, [])
+    suggestions = {area: ENHANCEMENT_SUGGESTIONS_MAP.get(area, []) for area in weak_areas}
 
     return {
         "verdict": verdict,
@@ -47,8 +97,88 @@ def evaluate_idea(idea: str):
         "next": "continue" if verdict == "pass" else "revise"
     }
 
+async def _evaluate_with(idea: str, generate):
+    # Shared by the sync and async entry points; generate is an async callable from prompt to reply text
+    prompt = VERIFICATION_PROMPT.format(idea=idea)
+    try:
+        response = await generate(prompt)
+        parsed = _parse_evaluation(response)
+        if parsed is None:
+            # One retry with a stricter instruction before giving up on the idea
+            response = await generate(prompt + STRICT_JSON_SUFFIX)
+            parsed = _parse_evaluation(response)
+    except ValueError as e:
+        # response.text raises ValueError when Gemini returns no text (e.g. a safety block)
+        return _error_result("Model returned no text", str(e))
+    if parsed is None:
+        return _error_result("Failed to parse model output", response)
+    return _build_result(parsed)
+
+def evaluate_idea(idea: str):
+    # Drives the shared path with the blocking client, so the gRPC asyncio transport is never bound to
+    # this throwaway loop; from inside a running event loop, use evaluate_ideas instead
+    async def _generate(prompt: str) -> str:
+        return cached_generate(_get_model(), prompt, _is_evaluation)
+
+    return asyncio.run(_evaluate_with(idea, _generate))
+
+async def _evaluate_one(idea: str, semaphore: asyncio.Semaphore):
+    # The caller's semaphore bounds in-flight Gemini requests across everything sharing it
+    async def _generate(prompt: str) -> str:
+        return await cached_generate_async(_get_model(), prompt, _is_evaluation)
+
+    async with semaphore:
+        return await _evaluate_with(idea, _generate)
+
+async def evaluate_ideas(ideas: list[str], max_concurrency: int = MAX_CONCURRENT_REQUESTS):
+    """
+    Evaluate several ideas concurrently so the Gemini round-trips overlap.
+    Returns one result per idea, in input order; a failed request yields an error result for that idea only.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await _gather_results(_evaluate_one(idea, semaphore) for idea in ideas)
+
+async def evaluate_ideas_batched(ideas: list[str], batch_size: int = IDEAS_PER_BATCH,
+                                 max_concurrency: int = MAX_CONCURRENT_REQUESTS):
+    """
+    Evaluate ideas several per Gemini call, amortizing the shared prompt across each batch.
+    Batches run concurrently; any idea whose entry in the batch reply is missing or malformed is re-evaluated on its own.
+    Returns one result per idea, in input order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _evaluate_batch(batch: list[str]):
+        prompt = VERIFICATION_PROMPT_BATCH.format(count=len(batch), ideas=orjson.dumps(batch).decode())
+        async with semaphore:
+            try:
+                response = await cached_generate_async(
+                    _get_model(), prompt, lambda reply: _is_complete_batch(reply, len(batch))
+                )
+            except ValueError:
+                response = ""
+        parsed = _parse_batch(response, len(batch)) or [None] * len(batch)
+
+        async def _result(idea: str, item):
+            if item is None:
+                return await _evaluate_one(idea, semaphore)
+            return _build_result(item)
+
+        return await _gather_results(_result(idea, item) for idea, item in zip(batch, parsed))
+
+    batches = [ideas[i:i + batch_size] for i in range(0, len(ideas), batch_size)]
+    outcomes = await asyncio.gather(*(_evaluate_batch(batch) for batch in batches), return_exceptions=True)
+    results = []
+    for batch, outcome in zip(batches, outcomes):
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, Exception):
+            # The batch request itself failed, so every idea in it gets the error
+            outcome = [_error_result("Model request failed", str(outcome)) for _ in batch]
+        results.extend(outcome)
+    return results
+
 def __main__():
     idea = "A decentralized finance platform using AI to optimize lending rates"
     result = evaluate_idea(idea)
     print("Evaluation Result:")
-    print(result)
\ No newline at end of file
+    print(result)
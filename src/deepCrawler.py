@@ -5,8 +5,9 @@ Handles the orchestration of searching, extracting, and summarizing market data.
 
 import os
 import json
+import asyncio
 from utils.search_api import query_sources
-from utils.extractors import extract_content
+from utils.extractors import extract_many
 from utils.loggers import setup_logger
 
 class DeepCrawlerAgent:
@@ -58,10 +59,11 @@ class DeepCrawlerAgent:
         sources = query_sources(self.porter_force, query)
         all_data = []
 
-        for source in sources:
+        self.logger.info(f"Extracting raw content from {len(sources)} sources")
+        contents = asyncio.run(extract_many([source['url'] for source in sources]))
+
+        for source, content in zip(sources, contents):
             url = source['url']
-            self.logger.info(f"Extracting raw content from: {url}")
-            content = extract_content(url)
             # Save all raw info, including timestamp, duplicates, etc.
             entry = {
                 "source_name": source.get('name', 'Unknown'),
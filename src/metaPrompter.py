@@ -4,17 +4,34 @@ Uses Gemini 2.5 Flash via Google Generative AI API. Modular, scalable, and outpu
 """
 import os
 import json
-from typing import Dict
+import asyncio
+from typing import Dict, List, Tuple
 import google.generativeai as genai
 from google.generativeai import GenerativeModel
 from dotenv import load_dotenv
+from utils.llm_cache import cached_generate, cached_generate_async
+from utils.llm_json import parse_json_response
 
-# Load environment and configure Gemini API key ONCE at module level
+# Load environment at import; the Gemini API key is configured ONCE, on first use
 load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise ValueError("GOOGLE_API_KEY not found in environment.")
-genai.configure(api_key=api_key)
+
+# Upper bound on in-flight Gemini requests, sized to the API tier's rate limit
+MAX_CONCURRENT_REQUESTS = 20
+
+_model = None
+
+def _get_model() -> GenerativeModel:
+    """
+    Configures the Gemini API key and builds the shared model on first use.
+    """
+    global _model
+    if _model is None:
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY not found in environment.")
+        genai.configure(api_key=api_key)
+        _model = GenerativeModel("gemini-2.5-flash")
+    return _model
 
 class MetaPromptAgent:
     """
@@ -22,7 +39,6 @@ class MetaPromptAgent:
     Outputs the prompt to ./prompts/prompt.txt for downstream use.
     """
     def __init__(self):
-        self.model = GenerativeModel("gemini-2.5-flash")
         self.prompt_template = ( """
         You are the DeepCrawler Agent embedded within an agentic system that analyzes the Financial Technology (FinTech) industry using Porter's Five Forces framework.
         Your mission is to autonomously plan and execute a deep market and ecosystem crawl using tools like Tavily, Gemini, and MCP APIs.
@@ -37,16 +53,16 @@ class MetaPromptAgent:
         5. Return structured and ranked results, including link metadata, sentiment analysis, signal strength, and force-specific relevance.
 
         Inputs:
-        - **Porter Force**: {{porter_force}}
-        - **Project Idea / Business Context**: {{project_idea}}
+        - **Porter Force**: {porter_force}
+        - **Project Idea / Business Context**: {project_idea}
 
         Output Format:
-        - **Force-Specific Keyword Strategy**: 10–20 high-precision keyword search queries related to {{porter_force}} and {{project_idea}} within FinTech.
-        - **Recommended APIs and Data Sources**: List of APIs/sources ranked by relevance for {{porter_force}}.
+        - **Force-Specific Keyword Strategy**: 10–20 high-precision keyword search queries related to {porter_force} and {project_idea} within FinTech.
+        - **Recommended APIs and Data Sources**: List of APIs/sources ranked by relevance for {porter_force}.
         - **Crawling Infrastructure**: Tools used (Tavily, Gemini, MCP), along with query rationale.
         - **Top 10 Relevant Entities**: e.g., FinTech startups, technologies, financial institutions, regulations, patents.
         - **Entity Metadata**: For each entity, return: title, summary, relevance score, keywords, link, source type, crawl timestamp.
-        - **Strategic Observations**: FinTech insights directly mapped to {{porter_force}} (e.g., how regulatory changes are increasing barriers to entry).
+        - **Strategic Observations**: FinTech insights directly mapped to {porter_force} (e.g., how regulatory changes are increasing barriers to entry).
         - **Confidence Scores**: Numerical signal strength for each observation (0–1 scale).
         - **Next-Step Recommendations**: Suggest refined queries, APIs, or source categories for recursive crawling.
 
@@ -67,33 +83,80 @@ class MetaPromptAgent:
         Provide strategic analysts with actionable, force-specific insights that enable deep understanding of the FinTech ecosystem surrounding the provided business context.
 
         Begin execution using:
-        - {{porter_force}}
-        - {{project_idea}}
+        - {porter_force}
+        - {project_idea}
         """
         )
         self.output_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'prompts', 'prompt.txt'))
 
+    @property
+    def model(self) -> GenerativeModel:
+        return _get_model()
+
     def generate_prompt(self, enhanced_idea: str, porter_force: str) -> str:
         """
         Generates the meta-prompt and writes it to ./prompts/prompt.txt.
         Returns the generated prompt string.
         """
-        prompt = self.prompt_template.format(
-            porter_force=porter_force,
-            enhanced_idea=enhanced_idea
-        )
-        response = self.model.generate_content(prompt)
-        # Try to parse as JSON, fallback to string
-        try:
-            instructions = json.loads(response.text)
-            pretty_instructions = json.dumps(instructions, indent=2, ensure_ascii=False)
-        except Exception:
-            pretty_instructions = response.text.strip()
+        prompt = self._build_prompt(enhanced_idea, porter_force)
+        response = cached_generate(self.model, prompt, self._is_valid_reply)
+        pretty_instructions = self._format_instructions(response)
         # Write to prompt.txt
         with open(self.output_path, "w", encoding="utf-8") as f:
             f.write(pretty_instructions)
         return pretty_instructions
 
+    async def generate_prompts_async(self, pairs: List[Tuple[str, str]], max_concurrency: int = MAX_CONCURRENT_REQUESTS) -> List[str]:
+        """
+        Generates meta-prompts for several (enhanced_idea, porter_force) pairs concurrently.
+        Returns the prompts in input order; unlike generate_prompt, nothing is written to prompt.txt.
+        A pair whose request fails gets a "Failed to generate prompt: ..." string in its place.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _generate(enhanced_idea: str, porter_force: str) -> str:
+            prompt = self._build_prompt(enhanced_idea, porter_force)
+            try:
+                async with semaphore:
+                    response = await cached_generate_async(self.model, prompt, self._is_valid_reply)
+            except Exception as e:
+                # One failed request must not discard the prompts generated for the other pairs
+                return f"Failed to generate prompt: {e}"
+            return self._format_instructions(response)
+
+        return await asyncio.gather(*(_generate(idea, force) for idea, force in pairs))
+
+    def _build_prompt(self, enhanced_idea: str, porter_force: str) -> str:
+        return self.prompt_template.format(
+            porter_force=porter_force,
+            project_idea=enhanced_idea
+        )
+
+    def _is_valid_reply(self, text: str) -> bool:
+        # Plain-text instructions are valid output, but blank or broken-JSON replies must not be cached
+        stripped = text.strip()
+        if not stripped:
+            return False
+        tag, payload = "", stripped
+        if stripped.startswith("```"):
+            # A fence only claims JSON through its tag or its payload; a ```markdown reply is plain text
+            tag, _, payload = stripped[3:].partition("\n")
+            payload = payload.strip()
+        if tag.strip().lower() == "json" or payload[:1] in ("{", "["):
+            try:
+                parse_json_response(stripped)
+            except ValueError:
+                return False
+        return True
+
+    def _format_instructions(self, text: str) -> str:
+        # Try to parse as JSON, fallback to string
+        try:
+            instructions = parse_json_response(text)
+            return json.dumps(instructions, indent=2, ensure_ascii=False)
+        except ValueError:
+            return text.strip()
+
 if __name__ == "__main__":
     idea = input("Enter your enhanced business idea: ").strip()
     if not idea:
@@ -4,12 +4,54 @@ No external config files required. Designed for B2B AI lead intelligence pipelin
 """
 import re
 import uuid
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache, partial
 from typing import Dict, Any, Optional, List
 import os
-import json
+import orjson
 import phonenumbers
 import spacy
+from utils.verif_rules import EMAIL_RE, URL_SCHEME_RE, URL_RE, MAX_EMAIL_LENGTH
+
+# Characters outside this set are stripped from free-text fields
+_DISALLOWED_CHARS_RE = re.compile(r'[^\w\s.,\-@:/]')
+_NON_WORD_RE = re.compile(r'\W')
+# Shortest number phonenumbers can validate (country code + national number, e.g. Iran);
+# inputs with fewer digits/letters are rejected before the costly parse
+_MIN_PHONE_CHARS = 6
+
+# Pipeline components not needed for NER, skipped when batching job titles
+_NER_UNUSED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+_NER_BATCH_SIZE = 256
+
+# Scalar lead fields written as-is to columnar output; address is flattened to address_* columns
+_LEAD_COLUMNS = ["id", "full_name", "first_name", "last_name", "email", "phone", "company", "job_title",
+                 "linkedin_url", "website_url", "industry", "company_size", "last_updated", "source"]
+_ADDRESS_COLUMNS = ["street", "city", "postal_code", "country"]
+# Base filename for process_all_json(aggregate=True) output
+_AGGREGATE_NAME = "all"
+
+def _utc_timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+def _batch_uuid4(count: int) -> List[str]:
+    """
+    Generate count random UUID4 strings from a single os.urandom read.
+    """
+    buf = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=buf[i:i + 16], version=4)) for i in range(0, len(buf), 16)]
+
+@lru_cache(maxsize=None)
+def _load_spacy(spacy_model: str):
+    """
+    Load a spaCy pipeline once per process; returns None if the model is not installed.
+    """
+    try:
+        return spacy.load(spacy_model)
+    except OSError:
+        print(f"spaCy model '{spacy_model}' not found. Entity extraction disabled.")
+        return None
 
 class SmartCleanerAgent:
     """
@@ -17,18 +59,20 @@ class SmartCleanerAgent:
     Iterates over all JSON files in ./data/raw and saves cleaned output to ./data/clean.
     """
     def __init__(self, spacy_model: str = "en_core_web_sm"):
-        try:
-            self.nlp = spacy.load(spacy_model)
-        except OSError:
-            print(f"spaCy model '{spacy_model}' not found. Entity extraction disabled.")
-            self.nlp = None
+        self.spacy_model = spacy_model
         self.raw_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'raw'))
         self.clean_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'clean'))
         os.makedirs(self.clean_dir, exist_ok=True)
 
-    def clean_lead(self, raw_lead: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    @property
+    def nlp(self):
+        # Loaded lazily so each worker process in process_all_json builds its own pipeline
+        return _load_spacy(self.spacy_model)
+
+    def clean_lead(self, raw_lead: Dict[str, Any], extract_entities: bool = True, now: Optional[str] = None,
+                   lead_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         lead = {
-            "id": str(uuid.uuid4()),
+            "id": lead_id or str(uuid.uuid4()),
             "full_name": self._clean_str(raw_lead.get("full_name")),
             "first_name": None,
             "last_name": None,
@@ -46,7 +90,7 @@ class SmartCleanerAgent:
             "website_url": self._normalize_url(raw_lead.get("website_url")),
             "industry": self._clean_str(raw_lead.get("industry")),
             "company_size": self._clean_str(raw_lead.get("company_size")),
-            "last_updated": datetime.now().isoformat() + "Z",
+            "last_updated": now or _utc_timestamp(),
             "source": raw_lead.get("source", "Unknown")
         }
         if lead["full_name"]:
@@ -56,42 +100,109 @@ class SmartCleanerAgent:
             if len(parts) > 1:
                 lead["last_name"] = parts[1].title()
         self._enrich_company(lead)
-        if lead["job_title"] and self.nlp:
+        if extract_entities and lead["job_title"] and self.nlp:
             lead["entities"] = self._extract_entities(lead["job_title"])
         return lead
 
     def clean_dataset(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        return [self.clean_lead(lead) for lead in leads if self.clean_lead(lead)]
+        # One timestamp for the whole batch instead of a clock read per lead
+        now = _utc_timestamp()
+        lead_ids = _batch_uuid4(len(leads))
+        candidates = (
+            self.clean_lead(lead, extract_entities=False, now=now, lead_id=lead_id)
+            for lead, lead_id in zip(leads, lead_ids)
+        )
+        cleaned = [lead for lead in candidates if lead]
+        self._attach_entities(cleaned)
+        return cleaned
 
     def deduplicate(self, leads: List[Dict[str, Any]], key_fields: List[str] = None) -> List[Dict[str, Any]]:
         if key_fields is None:
             key_fields = ["email"]
         seen = set()
         deduped = []
+        if len(key_fields) == 1:
+            # Bare string key. str(None) is "none", so leads whose field is None (e.g. a missing or
+            # invalid email) all share that key and only the first is kept; an absent or empty field
+            # gives an empty key and the lead is dropped
+            field = key_fields[0]
+            for lead in leads:
+                key = str(lead.get(field, '')).lower()
+                if key and key not in seen:
+                    deduped.append(lead)
+                    seen.add(key)
+            return deduped
         for lead in leads:
-            key = "_".join(str(lead.get(f, '')).lower() for f in key_fields)
-            if key and key not in seen:
+            key = tuple(str(lead.get(f, '')).lower() for f in key_fields)
+            if key not in seen:
                 deduped.append(lead)
                 seen.add(key)
         return deduped
 
+    def to_arrow(self, leads: List[Dict[str, Any]]):
+        """
+        Convert cleaned leads to a columnar pyarrow Table for vectorized downstream analytics.
+        Requires the optional pyarrow dependency.
+        """
+        import pyarrow as pa
+        columns = {name: [lead.get(name) for lead in leads] for name in _LEAD_COLUMNS}
+        # source is copied verbatim from the raw lead, so it may not be a string
+        columns["source"] = [None if value is None else str(value) for value in columns["source"]]
+        for part in _ADDRESS_COLUMNS:
+            columns[f"address_{part}"] = [lead["address"][part] for lead in leads]
+        columns["entities"] = [lead.get("entities") for lead in leads]
+        # Fixed schema so tables from different files line up even when a column is all null
+        names = pa.list_(pa.string())
+        entities = pa.struct([
+            ("persons", names),
+            ("organizations", names),
+            ("locations", names),
+            ("misc", pa.list_(pa.struct([("text", pa.string()), ("label", pa.string())]))),
+        ])
+        schema = pa.schema([(name, pa.string()) for name in columns if name != "entities"] + [("entities", entities)])
+        return pa.table(columns, schema=schema)
+
+    def write_parquet(self, leads: List[Dict[str, Any]], path: str) -> None:
+        """
+        Write cleaned leads to a zstd-compressed parquet file.
+        """
+        import pyarrow.parquet as pq
+        pq.write_table(self.to_arrow(leads), path, compression="zstd")
+
+    def _dedupe_raw(self, raw_leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Drop raw leads whose normalized email was already seen, so cleaning only runs on unique rows.
+        Leads without an email are kept here; the post-clean deduplicate pass then keys them all as "none"
+        and keeps only the first, so this pass never drops a lead that pass would keep.
+        """
+        seen = set()
+        deduped = []
+        for lead in raw_leads:
+            email = lead.get("email")
+            key = str(email).strip().lower() if email else ""
+            if key:
+                if key in seen:
+                    continue
+                seen.add(key)
+            deduped.append(lead)
+        return deduped
+
     def _clean_str(self, text: Optional[str]) -> Optional[str]:
         if text is None:
             return None
-        text = re.sub(r'\s+', ' ', text).strip()
-        text = re.sub(r'[^\w\s.,\-@:/]', '', text)
+        text = _DISALLOWED_CHARS_RE.sub('', ' '.join(text.split()))
         return text if text else None
 
     def _normalize_email(self, email: Optional[str]) -> Optional[str]:
         if not email:
             return None
         email = email.lower().strip()
-        if re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
+        if len(email) <= MAX_EMAIL_LENGTH and EMAIL_RE.match(email):
             return email
         return None
 
     def _normalize_phone(self, phone: Optional[str], country_code: str = "US") -> Optional[str]:
-        if not phone:
+        if not phone or len(_NON_WORD_RE.sub('', phone)) < _MIN_PHONE_CHARS:
             return None
         try:
             parsed = phonenumbers.parse(phone, country_code)
@@ -105,9 +216,9 @@ class SmartCleanerAgent:
         if not url:
             return None
         url = url.strip()
-        if not re.match(r'^[a-zA-Z]+://', url):
+        if not URL_SCHEME_RE.match(url):
             url = 'http://' + url
-        if re.match(r'https?://(?:[-\w.]|(?:%[0-9a-fA-F]{2}))+\S*', url):
+        if URL_RE.match(url):
             return url
         return None
 
@@ -122,44 +233,98 @@ class SmartCleanerAgent:
                 lead["company_size"] = "11-50 employees"
 
     def _extract_entities(self, text: str) -> Dict[str, Any]:
-        entities = {"persons": [], "organizations": [], "locations": [], "misc": []}
         if self.nlp:
-            doc = self.nlp(text)
-            for ent in doc.ents:
-                if ent.label_ == "PERSON":
-                    entities["persons"].append(ent.text)
-                elif ent.label_ == "ORG":
-                    entities["organizations"].append(ent.text)
-                elif ent.label_ == "GPE":
-                    entities["locations"].append(ent.text)
-                else:
-                    entities["misc"].append({"text": ent.text, "label": ent.label_})
+            return self._entities_from_doc(self.nlp(text))
+        return {"persons": [], "organizations": [], "locations": [], "misc": []}
+
+    def _attach_entities(self, leads: List[Dict[str, Any]]) -> None:
+        """
+        Run NER over all job titles in one nlp.pipe pass and store the results on each lead.
+        """
+        if not self.nlp:
+            return
+        titled = [lead for lead in leads if lead["job_title"]]
+        docs = self.nlp.pipe((lead["job_title"] for lead in titled), batch_size=_NER_BATCH_SIZE, disable=_NER_UNUSED_PIPES)
+        for lead, doc in zip(titled, docs):
+            lead["entities"] = self._entities_from_doc(doc)
+
+    def _entities_from_doc(self, doc) -> Dict[str, Any]:
+        entities = {"persons": [], "organizations": [], "locations": [], "misc": []}
+        for ent in doc.ents:
+            if ent.label_ == "PERSON":
+                entities["persons"].append(ent.text)
+            elif ent.label_ == "ORG":
+                entities["organizations"].append(ent.text)
+            elif ent.label_ == "GPE":
+                entities["locations"].append(ent.text)
+            else:
+                entities["misc"].append({"text": ent.text, "label": ent.label_})
         return entities
 
-    def process_all_json(self):
+    def process_all_json(self, max_workers: Optional[int] = None, columnar: bool = False, aggregate: bool = False):
         """
         Iterate over all JSON files in ./data/raw, clean and deduplicate, and save to ./data/clean with the same filename.
+        Files are processed in parallel across up to max_workers processes (default: one per CPU).
+        With columnar=True, a .parquet copy of each cleaned file is written alongside the JSON (requires pyarrow).
+        With aggregate=True, the leads of all files are deduplicated together and written once to
+        ./data/clean/all.ndjson (plus all.parquet if columnar) instead of one file per raw file.
         """
-        for filename in os.listdir(self.raw_dir):
-            if filename.endswith('.json'):
-                raw_path = os.path.join(self.raw_dir, filename)
-                clean_path = os.path.join(self.clean_dir, filename)
-                print(f"Processing {raw_path} ...")
-                with open(raw_path, encoding='utf-8') as f:
-                    try:
-                        raw_data = json.load(f)
-                    except Exception as e:
-                        print(f"Failed to load {filename}: {e}")
-                        continue
-                if isinstance(raw_data, dict):
-                    leads = [raw_data]
-                else:
-                    leads = raw_data
-                cleaned = self.clean_dataset(leads)
-                deduped = self.deduplicate(cleaned)
-                with open(clean_path, 'w', encoding='utf-8') as f:
-                    json.dump(deduped, f, ensure_ascii=False, indent=2)
-                print(f"Saved cleaned leads to {clean_path}")
+        process_file = partial(self._process_one_file, columnar=columnar, write=not aggregate)
+        json_files = sorted(f for f in os.listdir(self.raw_dir) if f.endswith('.json'))
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = min(max_workers, len(json_files))
+        if max_workers <= 1:
+            results = [process_file(filename) for filename in json_files]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(process_file, json_files))
+        if aggregate:
+            self._write_aggregate([lead for leads in results if leads for lead in leads], columnar)
+
+    def _process_one_file(self, filename: str, columnar: bool = False, write: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """
+        Clean and deduplicate one raw file; writes its clean outputs unless write=False.
+        Returns the cleaned leads, or None if the file could not be loaded.
+        """
+        raw_path = os.path.join(self.raw_dir, filename)
+        clean_path = os.path.join(self.clean_dir, filename)
+        print(f"Processing {raw_path} ...")
+        with open(raw_path, 'rb') as f:
+            try:
+                raw_data = orjson.loads(f.read())
+            except Exception as e:
+                print(f"Failed to load {filename}: {e}")
+                return None
+        if isinstance(raw_data, dict):
+            leads = [raw_data]
+        else:
+            leads = raw_data
+        cleaned = self.clean_dataset(self._dedupe_raw(leads))
+        # Safety net for leads the raw pass could not key (e.g. missing email)
+        deduped = self.deduplicate(cleaned)
+        if not write:
+            return deduped
+        with open(clean_path, 'wb') as f:
+            f.write(orjson.dumps(deduped, option=orjson.OPT_INDENT_2))
+        print(f"Saved cleaned leads to {clean_path}")
+        if columnar:
+            parquet_path = os.path.splitext(clean_path)[0] + '.parquet'
+            self.write_parquet(deduped, parquet_path)
+            print(f"Saved columnar leads to {parquet_path}")
+        return deduped
+
+    def _write_aggregate(self, leads: List[Dict[str, Any]], columnar: bool = False) -> None:
+        deduped = self.deduplicate(leads)
+        ndjson_path = os.path.join(self.clean_dir, _AGGREGATE_NAME + '.ndjson')
+        # One buffer and one write() for the whole corpus
+        with open(ndjson_path, 'wb') as f:
+            f.write(b''.join(orjson.dumps(lead, option=orjson.OPT_APPEND_NEWLINE) for lead in deduped))
+        print(f"Saved {len(deduped)} cleaned leads to {ndjson_path}")
+        if columnar:
+            parquet_path = os.path.join(self.clean_dir, _AGGREGATE_NAME + '.parquet')
+            self.write_parquet(deduped, parquet_path)
+            print(f"Saved columnar leads to {parquet_path}")
 
 if __name__ == "__main__":
     agent = SmartCleanerAgent()
@@ -2,8 +2,59 @@
 Module for extracting and cleaning HTML/text content from URLs.
 """
 
+import asyncio
+import codecs
+from email.message import Message
+from typing import List, Optional
+
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+
+# Cap on downloaded HTML per page; the useful text of most pages fits well within it
+MAX_DOWNLOAD_BYTES = 200_000
+# Truncate extracted text to avoid LLM context overflow
+MAX_TEXT_CHARS = 8000
+# Default number of URLs fetched concurrently by extract_many
+MAX_CONCURRENT_FETCHES = 50
+
+def _is_utf8(charset: str) -> bool:
+    try:
+        return codecs.lookup(charset).name == "utf-8"
+    except LookupError:
+        return False
+
+def _header_charset(content_type: Optional[str]) -> Optional[str]:
+    # requests reports ISO-8859-1 for any text/* response without a charset, so read the header itself
+    if not content_type:
+        return None
+    message = Message()
+    message["content-type"] = content_type
+    return message.get_content_charset()
+
+def html_to_text(html: bytes, charset: Optional[str] = None) -> str:
+    """
+    Strip scripts/styles from raw HTML bytes and return the visible text, truncated.
+    charset is the encoding declared by the server, if any; without one the parser
+    detects it from a BOM or <meta charset> tag.
+    """
+    if charset and _is_utf8(charset):
+        tree = LexborHTMLParser(html)
+    elif charset:
+        try:
+            tree = LexborHTMLParser(html.decode(charset, errors="replace"))
+        except LookupError:
+            # Unknown charset name: fall back to detecting it from the document
+            tree = LexborHTMLParser(html, encoding=True)
+    else:
+        tree = LexborHTMLParser(html, encoding=True)
+    for node in tree.css("script, style, noscript"):
+        node.decompose()
+    if tree.root is None:
+        return ""
+    # Collapse the runs of separators left behind by empty text nodes
+    text = ' '.join(tree.root.text(separator=' ', strip=True).split())
+    return text[:MAX_TEXT_CHARS]
 
 def extract_content(url: str) -> str:
     """
@@ -11,15 +62,42 @@ def extract_content(url: str) -> str:
     Returns cleaned text.
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        # Remove scripts/styles
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
-        # Extract visible text
-        text = ' '.join(soup.stripped_strings)
-        # Optionally truncate to avoid LLM context overflow
-        return text[:8000]
+        with requests.get(url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            html = response.raw.read(MAX_DOWNLOAD_BYTES, decode_content=True)
+            charset = _header_charset(response.headers.get("Content-Type"))
+        return html_to_text(html, charset)
     except Exception as e:
-        return f"Failed to extract content: {e}"
\ No newline at end of file
+        return f"Failed to extract content: {e}"
+
+
+async def extract_content_async(session: aiohttp.ClientSession, url: str) -> str:
+    """
+    Async counterpart of extract_content that fetches through a shared aiohttp session.
+    Returns cleaned text.
+    """
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            html = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                html += chunk
+                if len(html) >= MAX_DOWNLOAD_BYTES:
+                    break
+            charset = response.charset
+        return html_to_text(bytes(html[:MAX_DOWNLOAD_BYTES]), charset)
+    except Exception as e:
+        return f"Failed to extract content: {e}"
+
+async def extract_many(urls: List[str], concurrency: int = MAX_CONCURRENT_FETCHES) -> List[str]:
+    """
+    Fetch and clean several URLs concurrently over one session.
+    Returns the cleaned texts in input order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    async with aiohttp.ClientSession() as session:
+        async def _extract(url: str) -> str:
+            async with semaphore:
+                return await extract_content_async(session, url)
+
+        return await asyncio.gather(*(_extract(url) for url in urls))
@@ -0,0 +1,62 @@
+"""
+On-disk cache for LLM responses, keyed by a SHA-256 of the model name and prompt.
+"""
+
+import hashlib
+import os
+import sqlite3
+from functools import lru_cache
+from typing import Callable, Optional
+
+CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'cache', 'llm_cache.sqlite'))
+
+@lru_cache(maxsize=None)
+def _connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS responses (hash TEXT PRIMARY KEY, response TEXT NOT NULL)")
+    return conn
+
+def prompt_hash(model, prompt: str) -> str:
+    """
+    Return the cache key for a prompt sent to the given model.
+    """
+    return hashlib.sha256(f"{model.model_name}\n{prompt}".encode("utf-8")).hexdigest()
+
+def _lookup(key: str, path: str):
+    row = _connect(path).execute("SELECT response FROM responses WHERE hash = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def _store(key: str, response: str, path: str) -> None:
+    conn = _connect(path)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO responses (hash, response) VALUES (?, ?)", (key, response))
+
+def cached_generate(model, prompt: str, validate: Optional[Callable[[str], bool]] = None,
+                    cache_path: str = CACHE_PATH) -> str:
+    """
+    Return the text of model.generate_content(prompt), served from the cache when the prompt was seen before.
+    A fresh response is only stored if validate (when given) accepts it, so malformed replies are re-requested.
+    """
+    key = prompt_hash(model, prompt)
+    cached = _lookup(key, cache_path)
+    if cached is not None:
+        return cached
+    response = model.generate_content(prompt).text
+    if validate is None or validate(response):
+        _store(key, response, cache_path)
+    return response
+
+async def cached_generate_async(model, prompt: str, validate: Optional[Callable[[str], bool]] = None,
+                                cache_path: str = CACHE_PATH) -> str:
+    """
+    Async counterpart of cached_generate, using model.generate_content_async on a cache miss.
+    """
+    key = prompt_hash(model, prompt)
+    cached = _lookup(key, cache_path)
+    if cached is not None:
+        return cached
+    response = (await model.generate_content_async(prompt)).text
+    if validate is None or validate(response):
+        _store(key, response, cache_path)
+    return response
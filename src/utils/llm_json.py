@@ -0,0 +1,19 @@
+"""
+Helpers for parsing JSON returned by LLMs.
+"""
+
+import orjson
+
+def parse_json_response(text: str):
+    """
+    Parse a JSON object or array from an LLM response, tolerating a surrounding ``` fence.
+    Raises ValueError (orjson.JSONDecodeError for malformed JSON) if no JSON can be read.
+    """
+    payload = text.strip()
+    if payload.startswith("```"):
+        # Drop the opening fence line (e.g. ```json) and the closing fence
+        payload = payload.split("\n", 1)[1] if "\n" in payload else ""
+        payload = payload.rsplit("```", 1)[0].strip()
+    if not payload or payload[0] not in "{[":
+        raise ValueError("Response does not start with a JSON object or array")
+    return orjson.loads(payload)
@@ -1,3 +1,12 @@
+import re
+
+# Contact-field patterns shared by lead validation (see smartCleaner)
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+URL_SCHEME_RE = re.compile(r'^[a-zA-Z]+://')
+URL_RE = re.compile(r'https?://(?:[-\w.]|(?:%[0-9a-fA-F]{2}))+\S*')
+# RFC 5321 limit; longer inputs are rejected before EMAIL_RE can backtrack over them
+MAX_EMAIL_LENGTH = 254
+
 VERIFICATION_PROMPT = """
 You are a FinTech startup evaluator. Evaluate the following idea for relevance and business viability.
 
@@ -11,7 +20,7 @@ Evaluate the idea across the following criteria:
 5. Team Capability: Can this team deliver?
 
 Output JSON with this structure:
-{
+{{
   "relevance_score": int (0-10),
   "market_viability": int,
   "competitive_edge": int,
@@ -20,11 +29,35 @@ Output JSON with this structure:
   "verdict": "pass" | "fail",
   "reason": "short summary",
   "weak_areas": ["Market Viability", "Revenue Model"],
-  "suggestions": {
+  "suggestions": {{
     "Market Viability": ["Add specific target demographics"],
     "Revenue Model": ["Include revenue projections"]
-  }
-}
+  }}
+}}
+"""
+
+VERIFICATION_PROMPT_BATCH = """
+You are a FinTech startup evaluator. Evaluate each of the following {count} ideas independently for relevance and business viability.
+
+Ideas (JSON array):
+{ideas}
+
+Evaluate every idea across the following criteria:
+1. Relevance to FinTech (AI in Finance, DeFi, InsurTech, WealthTech, etc.)
+2. Market Viability: Demand, target market, growth potential.
+3. Competitive Edge: What makes it stand out?
+4. Revenue Model: Sustainable monetization approach?
+5. Team Capability: Can this team deliver?
+
+Output a JSON array with exactly {count} objects, one per idea and in the same order as the input, each with this structure:
+{{
+  "relevance_score": int (0-10),
+  "market_viability": int,
+  "competitive_edge": int,
+  "revenue_model": int,
+  "team_capability": int,
+  "reason": "short summary"
+}}
 """
 
 ENHANCEMENT_SUGGESTIONS_MAP = {
@@ -51,9 +84,17 @@ ENHANCEMENT_SUGGESTIONS_MAP = {
         "Mention specific financial technologies used"
     ]
 }
+
+# Score labels reported by evaluate_idea, mapped to their keys in the model's JSON output
+SCORE_FIELDS = {
+    "relevance_score": "relevance_score",
+    "Market Viability": "market_viability",
+    "Competitive Edge": "competitive_edge",
+    "Revenue Model": "revenue_model",
+    "Team Capability": "team_capability"
+}
+
 def assess_verdict(scores: dict, threshold: int = 6):
-    weak_areas = []
-    for k, v in scores.items():
-        if v < threshold:
-            weak_areas.append(k)
-    return "fail" if weak_areas or scores["relevance_score"] < threshold else "pass", weak_areas
+    # relevance_score is one of the scores, so any low score (including it) already fails
+    weak_areas = [k for k, v in scores.items() if v < threshold]
+    return "fail" if weak_areas else "pass", weak_areas